@@ -1,16 +1,50 @@
+import asyncio
+import hashlib
+import hmac
 import os
+import re
+import secrets
+import threading
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional, Dict, Any
-from uuid import uuid4
-
-from fastapi import FastAPI, HTTPException, Depends, Header
+from functools import lru_cache
+from typing import Annotated, List, Optional, Dict, Any
+
+import msgspec
+import orjson
+import uvicorn
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError
+from cachetools import TTLCache
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, EmailStr, Field
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+import database
+from database import create_document, get_documents
+
+db = None  # bound to the shared Motor database during lifespan startup
 
-from database import db, create_document, get_documents
 
-app = FastAPI(title="LearnHub API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # one Motor client per process, created inside the running event loop
+    global db
+    db = database.connect()
+    app.state.db = db
+    if db is not None:
+        await create_indexes()
+        await seed_course_if_empty()
+    yield
+    database.close()
+
+
+app = FastAPI(title="LearnHub API", version="0.1.0", default_response_class=ORJSONResponse, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,12 +54,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Added after CORS so compression wraps it; JSON here is highly repetitive
+# (keys, URLs, ISO timestamps) and small responses are left alone.
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=5)
+
+
+async def create_indexes():
+    # Turn the hot collection scans into index seeks; the TTL index on
+    # tokens.expires_at lets Mongo purge expired tokens on its own.
+    await db["tokens"].create_index("token", unique=True)
+    await db["tokens"].create_index("expires_at", expireAfterSeconds=0)
+    await db["user"].create_index("email", unique=True)
+    await db["lectureprogress"].create_index([("user_id", 1), ("course_id", 1), ("completed", 1)])
+    await db["message"].create_index([("discussion_id", 1), ("created_at", 1)])
+    await db["discussion"].create_index([("course_id", 1), ("created_at", -1)])
+
 
 # -----------------------------
 # Helpers
 # -----------------------------
 
+@lru_cache(maxsize=4096)
 def oid(id_str: str) -> ObjectId:
+    # ObjectId is immutable, so caching the hex -> ObjectId parse is safe
     try:
         return ObjectId(id_str)
     except Exception:
@@ -39,84 +90,121 @@ def now_utc():
 # Simple token store (tokens collection) for demo auth
 TOKEN_TTL_HOURS = 48
 
-def require_auth(authorization: Optional[str] = Header(default=None)) -> Dict[str, Any]:
+# token -> {"user": ..., "expires_at": ...} so repeat requests skip Mongo entirely
+AUTH_CACHE_TTL_SECONDS = 300
+_auth_cache: TTLCache = TTLCache(maxsize=10_000, ttl=AUTH_CACHE_TTL_SECONDS)
+_auth_cache_lock = threading.Lock()
+
+# Argon2id at the OWASP minimum cost parameters
+_password_hasher = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+
+
+async def require_auth(authorization: Optional[str] = Header(default=None)) -> Dict[str, Any]:
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=401, detail="Missing bearer token")
     token = authorization.split(" ", 1)[1]
-    tok = db["tokens"].find_one({"token": token})
+    cached = _auth_cache.get(token)
+    if cached is not None:
+        if not cached["expires_at"] or cached["expires_at"] > now_utc():
+            return dict(cached["user"])
+        with _auth_cache_lock:
+            _auth_cache.pop(token, None)
+        raise HTTPException(status_code=401, detail="Token expired")
+    tok = await db["tokens"].find_one({"token": token})
     if not tok:
         raise HTTPException(status_code=401, detail="Invalid token")
     if tok.get("expires_at") and tok["expires_at"] < now_utc():
         raise HTTPException(status_code=401, detail="Token expired")
-    user = db["user"].find_one({"_id": tok["user_id"]})
+    user = await db["user"].find_one({"_id": tok["user_id"]})
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     user["id"] = str(user.pop("_id"))
+    with _auth_cache_lock:
+        _auth_cache[token] = {"user": dict(user), "expires_at": tok.get("expires_at")}
     return user
 
 
 def hash_password(password: str) -> str:
-    # Lightweight hash for demo (not for production): salted sha256
-    import hashlib, secrets
-    salt = secrets.token_hex(8)
-    digest = hashlib.sha256((salt + password).encode()).hexdigest()
-    return f"{salt}${digest}"
+    return _password_hasher.hash(password)
 
 
 def verify_password(password: str, password_hash: str) -> bool:
-    import hashlib
+    if password_hash.startswith("$argon2"):
+        try:
+            return _password_hasher.verify(password_hash, password)
+        except VerifyMismatchError:
+            return False
+    # Legacy salted-sha256 hashes created before the argon2 migration
     try:
         salt, digest = password_hash.split("$")
     except ValueError:
         return False
-    return hashlib.sha256((salt + password).encode()).hexdigest() == digest
+    return hmac.compare_digest(hashlib.sha256((salt + password).encode()).hexdigest(), digest)
 
 
 # -----------------------------
 # Models
 # -----------------------------
-class RegisterRequest(BaseModel):
+# Request bodies are msgspec Structs decoded straight from the raw body,
+# so parsing and validation happen in a single C pass.
+
+EmailAddress = Annotated[str, msgspec.Meta(pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$")]
+
+
+class RegisterRequest(msgspec.Struct, gc=False):
     name: str
-    email: EmailStr
+    email: EmailAddress
     password: str
 
 
-class LoginRequest(BaseModel):
-    email: EmailStr
+class LoginRequest(msgspec.Struct, gc=False):
+    email: EmailAddress
     password: str
 
 
-class ChatRequest(BaseModel):
+class ChatRequest(msgspec.Struct, gc=False):
+    message: str
     course_id: Optional[str] = None
     user_id: Optional[str] = None
-    message: str
 
 
-class ProgressUpdate(BaseModel):
+class ProgressUpdate(msgspec.Struct, gc=False):
     lecture_id: str
     watched_seconds: int
     completed: bool = False
     bookmark: Optional[int] = None
 
 
-class QuizSubmission(BaseModel):
+class QuizSubmission(msgspec.Struct, gc=False):
     course_id: str
     quiz_id: str
     answers: Dict[str, Any]
 
 
-class DiscussionCreate(BaseModel):
+class DiscussionCreate(msgspec.Struct, gc=False):
     course_id: str
     title: str
     content: str
-    tags: List[str] = Field(default_factory=list)
+    tags: List[str] = msgspec.field(default_factory=list)
 
 
-class MessageCreate(BaseModel):
+class MessageCreate(msgspec.Struct, gc=False):
     discussion_id: str
     content: str
 
 
+def parse_body(cls):
+    """Dependency that decodes and validates the request body as a msgspec Struct."""
+    async def _parse(request: Request):
+        try:
+            return msgspec.json.decode(await request.body(), type=cls)
+        except msgspec.ValidationError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except msgspec.DecodeError:
+            raise HTTPException(status_code=400, detail="Invalid JSON body")
+    return _parse
+
+
 # -----------------------------
 # Root & Health
 # -----------------------------
@@ -126,7 +214,7 @@ def read_root():
 
 
 @app.get("/test")
-def test_database():
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -141,7 +229,7 @@ def test_database():
             response["database_url"] = "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set"
             response["database_name"] = db.name
             response["connection_status"] = "Connected"
-            response["collections"] = db.list_collection_names()[:10]
+            response["collections"] = (await db.list_collection_names())[:10]
         else:
             response["database"] = "⚠️  Available but not initialized"
     except Exception as e:
@@ -153,24 +241,25 @@ def test_database():
 # Auth
 # -----------------------------
 @app.post("/auth/register")
-def register(req: RegisterRequest):
-    existing = db["user"].find_one({"email": req.email})
-    if existing:
-        raise HTTPException(status_code=400, detail="Email already registered")
+async def register(req: RegisterRequest = Depends(parse_body(RegisterRequest))):
     user_doc = {
         "name": req.name,
         "email": req.email,
-        "password_hash": hash_password(req.password),
+        "password_hash": await run_in_threadpool(hash_password, req.password),
         "interests": [],
         "roles": ["user"],
         "is_active": True,
         "created_at": now_utc(),
         "updated_at": now_utc(),
     }
-    res = db["user"].insert_one(user_doc)
+    # the unique index on user.email makes the insert the duplicate check
+    try:
+        res = await db["user"].insert_one(user_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     # auto sign-in
-    token = str(uuid4())
-    db["tokens"].insert_one({
+    token = secrets.token_urlsafe(24)
+    await db["tokens"].insert_one({
         "token": token,
         "user_id": res.inserted_id,
         "created_at": now_utc(),
@@ -180,12 +269,12 @@ def register(req: RegisterRequest):
 
 
 @app.post("/auth/login")
-def login(req: LoginRequest):
-    user = db["user"].find_one({"email": req.email})
-    if not user or not verify_password(req.password, user.get("password_hash", "")):
+async def login(req: LoginRequest = Depends(parse_body(LoginRequest))):
+    user = await db["user"].find_one({"email": req.email})
+    if not user or not await run_in_threadpool(verify_password, req.password, user.get("password_hash", "")):
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    token = str(uuid4())
-    db["tokens"].insert_one({
+    token = secrets.token_urlsafe(24)
+    await db["tokens"].insert_one({
         "token": token,
         "user_id": user["_id"],
         "created_at": now_utc(),
@@ -195,7 +284,7 @@ def login(req: LoginRequest):
 
 
 @app.get("/auth/me")
-def me(user=Depends(require_auth)):
+async def me(user=Depends(require_auth)):
     return {"user": user}
 
 
@@ -203,8 +292,8 @@ def me(user=Depends(require_auth)):
 # Courses & Content
 # -----------------------------
 
-def seed_course_if_empty():
-    if db["course"].count_documents({}) == 0:
+async def seed_course_if_empty():
+    if await db["course"].count_documents({}) == 0:
         sample_course = {
             "title": "Modern React Foundations",
             "description": "Build production-grade UIs with hooks, context, and performance patterns.",
@@ -228,99 +317,156 @@ def seed_course_if_empty():
             "created_at": now_utc(),
             "updated_at": now_utc()
         }
-        db["course"].insert_one(sample_course)
+        await db["course"].insert_one(sample_course)
+
+
+# Card fields only — keeps playlists (and quiz answers!) out of the listing
+COURSE_LIST_PROJECTION = {
+    "title": 1, "description": 1, "category": 1, "skills": 1,
+    "thumbnail_url": 1, "level": 1, "duration_minutes": 1,
+}
 
 
 @app.get("/courses")
-def list_courses():
-    seed_course_if_empty()
-    items = []
-    for c in db["course"].find({}).limit(50):
-        c["id"] = str(c.pop("_id"))
-        items.append(c)
-    return {"items": items}
+async def list_courses():
+    # stream one orjson-encoded doc per cursor iteration instead of
+    # materializing the whole listing before encoding it
+    async def generate():
+        yield b'{"items":['
+        first = True
+        async for c in db["course"].find({}, projection=COURSE_LIST_PROJECTION).limit(50):
+            c["id"] = str(c.pop("_id"))
+            yield (b"" if first else b",") + orjson.dumps(c)
+            first = False
+        yield b"]}"
+    return StreamingResponse(generate(), media_type="application/json")
 
 
 @app.get("/courses/{course_id}")
-def get_course(course_id: str):
-    c = db["course"].find_one({"_id": oid(course_id)})
+async def get_course(course_id: str):
+    c = await _get_course(course_id)
     if not c:
         raise HTTPException(status_code=404, detail="Course not found")
+    c = dict(c)
     c["id"] = str(c.pop("_id"))
-    return c
+    return ORJSONResponse(c)
 
 
 @app.get("/courses/{course_id}/progress")
-def get_course_progress(course_id: str, user=Depends(require_auth)):
-    prog = db["courseprogress"].find_one({"user_id": user["id"], "course_id": course_id})
-    if not prog:
+async def get_course_progress(course_id: str, user=Depends(require_auth)):
+    prog = await db["courseprogress"].find_one({"user_id": user["id"], "course_id": course_id})
+    if prog:
+        prog["id"] = str(prog.pop("_id"))
+    else:
         prog = {"user_id": user["id"], "course_id": course_id, "completed_lecture_ids": [], "percentage": 0.0}
     # lecture-level progress list
-    lectures = list(db["lectureprogress"].find({"user_id": user["id"], "course_id": course_id}))
+    lectures = await db["lectureprogress"].find({"user_id": user["id"], "course_id": course_id}).to_list(length=None)
     for lp in lectures:
         lp["id"] = str(lp.pop("_id"))
-    return {"course": course_id, "course_progress": prog, "lectures": lectures}
+    return ORJSONResponse({"course": course_id, "course_progress": prog, "lectures": lectures})
+
+
+# Course docs are effectively static, so serve the hot course/progress/quiz/
+# chatbot paths from a short-lived in-process cache. Callers must treat the
+# returned dict as read-only; copy before mutating.
+_course_cache: TTLCache = TTLCache(maxsize=512, ttl=60)
+
+
+async def _get_course(course_id: str) -> Optional[Dict[str, Any]]:
+    course = _course_cache.get(course_id)
+    if course is None:
+        course = await db["course"].find_one({"_id": oid(course_id)})
+        if course is not None:
+            _course_cache[course_id] = course
+    return course
+
+
+async def _get_total_lectures(course_id: str) -> Optional[int]:
+    course = await _get_course(course_id)
+    if course is None:
+        return None
+    return len(course.get("playlist", [])) or 1
 
 
 @app.patch("/courses/{course_id}/progress")
-def update_lecture_progress(course_id: str, update: ProgressUpdate, user=Depends(require_auth)):
+async def update_lecture_progress(course_id: str, update: ProgressUpdate = Depends(parse_body(ProgressUpdate)), user=Depends(require_auth)):
+    total_lectures = await _get_total_lectures(course_id)
+    if total_lectures is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    now = now_utc()
     # upsert lecture progress
-    db["lectureprogress"].update_one(
+    await db["lectureprogress"].update_one(
         {"user_id": user["id"], "course_id": course_id, "lecture_id": update.lecture_id},
-        {"$set": {"watched_seconds": update.watched_seconds, "completed": update.completed, "updated_at": now_utc()},
-         "$setOnInsert": {"created_at": now_utc()}},
+        {"$set": {"watched_seconds": update.watched_seconds, "completed": update.completed, "updated_at": now},
+         "$setOnInsert": {"created_at": now}},
         upsert=True
     )
-    # compute course progress
-    course = db["course"].find_one({"_id": oid(course_id)})
-    if not course:
-        raise HTTPException(status_code=404, detail="Course not found")
-    total_lectures = len(course.get("playlist", [])) or 1
-    completed_ids = [lp.get("lecture_id") for lp in db["lectureprogress"].find({"user_id": user["id"], "course_id": course_id, "completed": True})]
-    percent = round(len(completed_ids) * 100.0 / total_lectures, 2)
-    db["courseprogress"].update_one(
+    # maintain completed_lecture_ids in place and derive the percentage in the
+    # same pipeline update instead of re-scanning lectureprogress
+    if update.completed:
+        ids_expr = {"$setUnion": [{"$ifNull": ["$completed_lecture_ids", []]}, [update.lecture_id]]}
+    else:
+        ids_expr = {"$setDifference": [{"$ifNull": ["$completed_lecture_ids", []]}, [update.lecture_id]]}
+    prog = await db["courseprogress"].find_one_and_update(
         {"user_id": user["id"], "course_id": course_id},
-        {"$set": {"completed_lecture_ids": completed_ids, "percentage": percent, "updated_at": now_utc()},
-         "$setOnInsert": {"created_at": now_utc()}},
-        upsert=True
+        [
+            {"$set": {
+                "completed_lecture_ids": ids_expr,
+                "updated_at": now,
+                "created_at": {"$ifNull": ["$created_at", now]},
+            }},
+            {"$set": {
+                "percentage": {"$round": [{"$multiply": [{"$divide": [{"$size": "$completed_lecture_ids"}, total_lectures]}, 100.0]}, 2]},
+            }},
+        ],
+        upsert=True,
+        return_document=ReturnDocument.AFTER
     )
-    return {"ok": True, "percentage": percent, "completed": completed_ids}
+    return {"ok": True, "percentage": prog["percentage"], "completed": prog["completed_lecture_ids"]}
 
 
 # -----------------------------
 # Quizzes & Certificates
 # -----------------------------
 @app.post("/quizzes/submit")
-def submit_quiz(sub: QuizSubmission, user=Depends(require_auth)):
-    course = db["course"].find_one({"_id": oid(sub.course_id)})
+async def submit_quiz(sub: QuizSubmission = Depends(parse_body(QuizSubmission)), user=Depends(require_auth)):
+    course = await _get_course(sub.course_id)
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     quiz = next((q for q in course.get("quizzes", []) if q.get("id") == sub.quiz_id), None)
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
-    total = len(quiz.get("questions", [])) or 1
-    correct = 0
-    for q in quiz["questions"]:
-        ans_index = sub.answers.get(q["id"])  # expected index of choice
-        if isinstance(ans_index, int) and ans_index == q.get("answer"):
-            correct += 1
+    questions = quiz.get("questions", [])
+    total = len(questions) or 1
+    answers = sub.answers  # question id -> submitted choice index
+    correct = sum(
+        1 for q in questions
+        if isinstance((ans := answers.get(q["id"])), int) and ans == q.get("answer")
+    )
     score = round(correct * 100.0 / total, 2)
     passed = score >= course.get("certificate_threshold", 70)
-    res = db["quizresult"].insert_one({
+    result_doc = {
         "user_id": user["id"], "course_id": sub.course_id, "quiz_id": sub.quiz_id,
         "score_percent": score, "answers": sub.answers, "passed": passed,
         "created_at": now_utc(), "updated_at": now_utc()
-    })
+    }
     certificate = None
     if passed:
-        code = f"LH-{uuid4().hex[:8].upper()}"
+        code = f"LH-{secrets.token_hex(4).upper()}"
         cert_doc = {
             "user_id": user["id"], "course_id": sub.course_id, "quiz_id": sub.quiz_id,
             "score_percent": score, "certificate_code": code,
             "issued_at": now_utc(), "created_at": now_utc(), "updated_at": now_utc()
         }
-        cert_res = db["certificate"].insert_one(cert_doc)
-        certificate = {"id": str(cert_res.inserted_id), **{k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in cert_doc.items()}}
+        # result and certificate go to different collections, so overlap the
+        # two inserts instead of paying the round-trips sequentially
+        res, cert_res = await asyncio.gather(
+            db["quizresult"].insert_one(result_doc),
+            db["certificate"].insert_one(cert_doc),
+        )
+        certificate = {"id": str(cert_res.inserted_id), **cert_doc}
+    else:
+        res = await db["quizresult"].insert_one(result_doc)
     return {"result_id": str(res.inserted_id), "score": score, "passed": passed, "certificate": certificate}
 
 
@@ -328,63 +474,81 @@ def submit_quiz(sub: QuizSubmission, user=Depends(require_auth)):
 # Discussions
 # -----------------------------
 @app.get("/discussions")
-def list_discussions(course_id: Optional[str] = None):
+async def list_discussions(course_id: Optional[str] = None):
     query = {"course_id": course_id} if course_id else {}
     items = []
-    for d in db["discussion"].find(query).sort("created_at", -1).limit(50):
+    projection = {"course_id": 1, "user_id": 1, "title": 1, "content": 1, "tags": 1, "created_at": 1}
+    async for d in db["discussion"].find(query, projection=projection).sort("created_at", -1).limit(50):
         d["id"] = str(d.pop("_id"))
         items.append(d)
-    return {"items": items}
+    return ORJSONResponse({"items": items})
 
 
 @app.post("/discussions")
-def create_discussion(req: DiscussionCreate, user=Depends(require_auth)):
+async def create_discussion(req: DiscussionCreate = Depends(parse_body(DiscussionCreate)), user=Depends(require_auth)):
     doc = {
         "course_id": req.course_id, "user_id": user["id"],
         "title": req.title, "content": req.content, "tags": req.tags,
         "created_at": now_utc(), "updated_at": now_utc()
     }
-    res = db["discussion"].insert_one(doc)
+    res = await db["discussion"].insert_one(doc)
     return {"id": str(res.inserted_id), **doc}
 
 
 @app.get("/discussions/{discussion_id}/messages")
-def list_messages(discussion_id: str):
+async def list_messages(discussion_id: str):
     items = []
-    for m in db["message"].find({"discussion_id": discussion_id}).sort("created_at", 1):
+    projection = {"content": 1, "user_id": 1, "created_at": 1}
+    async for m in db["message"].find({"discussion_id": discussion_id}, projection=projection).sort("created_at", 1):
         m["id"] = str(m.pop("_id"))
         items.append(m)
-    return {"items": items}
+    return ORJSONResponse({"items": items})
 
 
 @app.post("/discussions/{discussion_id}/messages")
-def create_message(discussion_id: str, req: MessageCreate, user=Depends(require_auth)):
+async def create_message(discussion_id: str, req: MessageCreate = Depends(parse_body(MessageCreate)), user=Depends(require_auth)):
     doc = {"discussion_id": discussion_id, "user_id": user["id"], "content": req.content, "created_at": now_utc()}
-    res = db["message"].insert_one(doc)
+    res = await db["message"].insert_one(doc)
     return {"id": str(res.inserted_id), **doc}
 
 
 # -----------------------------
 # Chatbot (Rule-based demo)
 # -----------------------------
+
+# keyword -> tip; matched with one compiled regex pass instead of a
+# substring scan per rule, so adding rules stays O(len(prompt))
+CHATBOT_RULES = {
+    "state": "Remember: useState returns [value, setValue]. Update state immutably.",
+    "use state": "Remember: useState returns [value, setValue]. Update state immutably.",
+    "effect": "useEffect runs after render. Add dependencies to control when it runs.",
+    "performance": "Consider useMemo/useCallback to memoize expensive calculations and handlers.",
+    "optimize": "Consider useMemo/useCallback to memoize expensive calculations and handlers.",
+}
+CHATBOT_FALLBACK_TIP = "Focus on one concept at a time, review the lecture notes, and try a small hands-on example."
+_chatbot_matcher = re.compile("|".join(re.escape(kw) for kw in CHATBOT_RULES))
+
+
+async def _log_chat(msg_doc: Dict[str, Any]):
+    await db["chatlog"].insert_one(msg_doc)
+
+
 @app.post("/chatbot")
-def chatbot(req: ChatRequest, user=Depends(require_auth)):
+async def chatbot(background: BackgroundTasks, req: ChatRequest = Depends(parse_body(ChatRequest)), user=Depends(require_auth)):
     prompt = req.message.strip().lower()
     tips = []
-    if "state" in prompt or "use state" in prompt:
-        tips.append("Remember: useState returns [value, setValue]. Update state immutably.")
-    if "effect" in prompt:
-        tips.append("useEffect runs after render. Add dependencies to control when it runs.")
-    if "performance" in prompt or "optimize" in prompt:
-        tips.append("Consider useMemo/useCallback to memoize expensive calculations and handlers.")
+    for match in _chatbot_matcher.finditer(prompt):
+        tip = CHATBOT_RULES[match.group(0)]
+        if tip not in tips:
+            tips.append(tip)
     if not tips:
-        tips.append("Focus on one concept at a time, review the lecture notes, and try a small hands-on example.")
+        tips.append(CHATBOT_FALLBACK_TIP)
     response = " ".join(tips)
 
     # add contextual references if course provided
     refs: List[Dict[str, Any]] = []
     if req.course_id:
-        c = db["course"].find_one({"_id": oid(req.course_id)})
+        c = await _get_course(req.course_id)
         if c:
             for lec in c.get("playlist", [])[:2]:
                 refs.append({"lecture_id": lec.get("id"), "title": lec.get("title"), "suggested_timestamp": 60})
@@ -393,11 +557,11 @@ def chatbot(req: ChatRequest, user=Depends(require_auth)):
         "user_id": user["id"], "course_id": req.course_id, "prompt": req.message,
         "response": response, "refs": refs, "created_at": now_utc()
     }
-    db["chatlog"].insert_one(msg_doc)
+    # the client doesn't need the log persisted before it gets the reply
+    background.add_task(_log_chat, msg_doc)
     return {"reply": response, "references": refs}
 
 
 if __name__ == "__main__":
-    import uvicorn
     port = int(os.getenv("PORT", 8000))
     uvicorn.run(app, host="0.0.0.0", port=port)